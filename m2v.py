@@ -1,6 +1,12 @@
 #!/usr/bin/env python3
 import argparse
 import asyncio
+import functools
+import hashlib
+import importlib.util
+import io
+import itertools
+import multiprocessing
 import os
 import re
 import shutil
@@ -8,9 +14,12 @@ import subprocess
 import sys
 import tempfile
 import zipfile
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Tuple, Union
 
+import PIL
 from PIL import Image
 
 try:
@@ -18,8 +27,50 @@ try:
 except ImportError:
     edge_tts = None
 
+try:
+    import pyvips
+except ImportError:
+    pyvips = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import scipy.sparse
+except ImportError:
+    scipy = None
+
 
 IMG_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
+TTS_CHUNK_CHARS = 300
+TTS_CONCURRENCY = 4
+TTS_CACHE_MAX_BYTES = 256 * 1024 * 1024
+FRAME_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# A page is an image file on disk, or a (cbz_path, entry_name) read straight from the archive
+Page = Union[Path, Tuple[Path, str]]
+# Staged page file names (see stage_pages), a printf pattern for ffmpeg's image2 demuxer
+STAGE_NAME = "page_%05d"
+BACKENDS = ["ffmpeg", "pillow", "pillow-simd", "vips", "sparse", "numba"]
+FILTERS = ["auto", "lanczos", "bicubic", "bilinear"]
+# --encoder choice -> (ffmpeg encoder, pixel format it takes natively)
+ENCODERS = {
+    "x264": ("libx264", "yuv420p"),
+    "nvenc": ("h264_nvenc", "yuv420p"),
+    "hevc_nvenc": ("hevc_nvenc", "yuv420p"),
+    "videotoolbox": ("h264_videotoolbox", "yuv420p"),
+    "qsv": ("h264_qsv", "nv12"),
+}
+# Raw frames piped from the Python backends: planar 4:2:0 (1.5 B/px, what zoompan and
+# the encoders consume) when numpy is around to convert, else packed RGB (3 B/px)
+FRAME_PIX_FMT = "yuv420p" if np is not None else "rgb24"
+# BT.709 limited-range RGB -> Y'CbCr, rows Y, Cb, Cr (scaled for 8-bit code values)
+BT709 = [
+    [0.2126 * 219 / 255, 0.7152 * 219 / 255, 0.0722 * 219 / 255],
+    [-0.1146 * 224 / 255, -0.3854 * 224 / 255, 0.5 * 224 / 255],
+    [0.5 * 224 / 255, -0.4542 * 224 / 255, -0.0458 * 224 / 255],
+]
 
 
 def die(msg: str, code: int = 1) -> None:
@@ -35,6 +86,88 @@ def run(cmd: List[str]) -> None:
         die(f"Command failed: {' '.join(cmd)}")
 
 
+def run_piped(cmd: List[str], chunks: Iterable[bytes]) -> None:
+    """
+    Run cmd, streaming chunks into its stdin. If chunks raises, the process is killed
+    rather than left to finish a truncated output, and the error propagates.
+    """
+    print("[CMD]", " ".join(cmd))
+    # ffmpeg logs progress continuously; spool it to a file so a full stderr pipe can't block us
+    with tempfile.TemporaryFile() as log:
+        p = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            for chunk in chunks:
+                p.stdin.write(chunk)
+        except BrokenPipeError:
+            pass
+        except BaseException:
+            p.kill()
+            p.wait()
+            raise
+        finally:
+            try:
+                p.stdin.close()
+            except BrokenPipeError:
+                pass
+        if p.wait() != 0:
+            log.seek(0)
+            print(log.read().decode(errors="replace"))
+            die(f"Command failed: {' '.join(cmd)}")
+
+
+def concat_quote(path: Path) -> str:
+    """Quote a path for an ffmpeg concat demuxer list."""
+    return "'" + str(path).replace("'", "'\\''") + "'"
+
+
+def cache_dir(kind: str) -> Path:
+    """
+    ~/.cache/m2v/<kind> (honours XDG_CACHE_HOME), created on demand.
+    Raises OSError when it can't be created or written (e.g. read-only HOME).
+    """
+    root = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    d = root / "m2v" / kind
+    d.mkdir(parents=True, exist_ok=True)
+    if not os.access(d, os.W_OK):
+        raise PermissionError(f"Cache folder is not writable: {d}")
+    return d
+
+
+def prune_cache(folder: Path, max_bytes: int) -> None:
+    """
+    Evict least recently used files (hits are touched) until folder is under max_bytes.
+    Best effort: the cache only saves work, so failing to trim it never fails a run.
+    """
+    try:
+        entries = []
+        for p in folder.iterdir():
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries):
+            if total <= max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+    except OSError:
+        pass
+
+
+def check_backend(backend: str) -> None:
+    if backend == "vips" and pyvips is None:
+        die("pyvips is not installed. Run: pip install pyvips")
+    if backend == "pillow-simd" and ".post" not in PIL.__version__:
+        die("pillow-simd is not installed. Run: pip uninstall -y pillow && pip install pillow-simd")
+    if backend == "sparse" and (np is None or scipy is None):
+        die("numpy/scipy are not installed. Run: pip install numpy scipy")
+    # numba is slow to import, so it is only loaded by the workers that use it
+    if backend == "numba" and (np is None or importlib.util.find_spec("numba") is None):
+        die("numba is not installed. Run: pip install numba")
+
+
 def check_ffmpeg() -> None:
     try:
         subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
@@ -42,101 +175,474 @@ def check_ffmpeg() -> None:
         die("ffmpeg not found. Install ffmpeg and make sure it's in PATH.")
 
 
+def resolve_encoder(encoder: str) -> str:
+    """
+    Return encoder if it can actually encode here, else fall back to x264.
+    Builds often include e.g. h264_nvenc without a GPU to run it, so a one-frame
+    test encode is tried rather than trusting `ffmpeg -encoders`.
+    """
+    if encoder == "x264":
+        return encoder
+    codec, pix_fmt = ENCODERS[encoder]
+    p = subprocess.run([
+        "ffmpeg", "-hide_banner", "-v", "error",
+        "-f", "lavfi", "-i", "color=s=256x256",
+        "-frames:v", "1",
+        "-pix_fmt", pix_fmt,
+        "-c:v", codec,
+        "-f", "null", "-",
+    ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if p.returncode != 0:
+        print(f"[INFO] {codec} is unavailable with this ffmpeg/hardware; falling back to x264")
+        return "x264"
+    return encoder
+
+
+def encoder_args(encoder: str, crf: int) -> List[str]:
+    """Video codec args for an ENCODERS key, mapping crf onto each encoder's quality knob."""
+    codec = ENCODERS[encoder][0]
+    if encoder in ("nvenc", "hevc_nvenc"):
+        args = ["-preset", "p5", "-tune", "hq", "-rc", "vbr", "-cq", str(crf), "-b:v", "0"]
+        if encoder == "hevc_nvenc":
+            args += ["-tag:v", "hvc1"]  # lets QuickTime/Safari play HEVC in mp4
+    elif encoder == "videotoolbox":
+        # -q:v is 1-100, higher is better
+        args = ["-q:v", str(max(1, min(100, 100 - 2 * crf)))]
+    elif encoder == "qsv":
+        args = ["-global_quality", str(crf), "-preset", "medium"]
+    else:
+        args = ["-crf", str(crf), "-preset", "medium"]
+    return ["-c:v", codec] + args
+
+
+_NAT_RE = re.compile(r"(\d+)")
+
+
 def natural_sort_key(s: str):
-    return [int(t) if t.isdigit() else t.lower() for t in re.split(r"(\d+)", s)]
+    return tuple(int(t) if t.isdigit() else t.lower() for t in _NAT_RE.split(s))
 
 
 def collect_images_from_dir(folder: Path) -> List[Path]:
     if not folder.exists() or not folder.is_dir():
         die(f"Input folder not found: {folder}")
-    imgs = [p for p in folder.iterdir() if p.suffix.lower() in IMG_EXTS and p.is_file()]
+    # scandir's file type comes from readdir, so rejected entries cost no stat and no Path
+    with os.scandir(folder) as it:
+        imgs = [
+            Path(e.path)
+            for e in it
+            if os.path.splitext(e.name)[1].lower() in IMG_EXTS and e.is_file()
+        ]
     imgs.sort(key=lambda p: natural_sort_key(p.name))
     if not imgs:
         die(f"No images found in folder: {folder}")
     return imgs
 
 
-def extract_cbz(cbz_path: Path, out_dir: Path) -> List[Path]:
+def list_cbz_pages(cbz_path: Path) -> List[Tuple[Path, str]]:
+    """List image entries of a CBZ in natural order; pages are decoded from the zip, not extracted."""
     if not cbz_path.exists() or not cbz_path.is_file():
         die(f"CBZ not found: {cbz_path}")
     with zipfile.ZipFile(cbz_path, "r") as z:
-        z.extractall(out_dir)
-    # collect images recursively
-    imgs = []
-    for p in out_dir.rglob("*"):
-        if p.is_file() and p.suffix.lower() in IMG_EXTS:
-            imgs.append(p)
-    imgs.sort(key=lambda p: natural_sort_key(p.name))
-    if not imgs:
+        names = [
+            zi.filename for zi in z.infolist()
+            if not zi.is_dir() and os.path.splitext(zi.filename)[1].lower() in IMG_EXTS
+        ]
+    names.sort(key=natural_sort_key)
+    if not names:
         die(f"No images found inside CBZ: {cbz_path}")
-    return imgs
+    return [(cbz_path, name) for name in names]
+
+
+def _page_name(page: Page) -> str:
+    return page[1] if isinstance(page, tuple) else page.name
+
+
+def common_page_ext(images: List[Page]) -> Optional[str]:
+    """
+    The extension shared by all pages, or None if they mix image formats.
+    ffmpeg's image2 demuxer picks a single decoder for the whole sequence.
+    """
+    exts = set()
+    for page in images:
+        ext = os.path.splitext(_page_name(page))[1].lower()
+        exts.add(".jpg" if ext == ".jpeg" else ext)
+    return exts.pop() if len(exts) == 1 else None
+
+
+def stage_pages(images: List[Page], stage_dir: Path, ext: str) -> List[Path]:
+    """
+    Lay pages out as page_00001.<ext>, page_00002.<ext>, ... so ffmpeg's image2 demuxer
+    reads them in natural-sort order: files are symlinked, CBZ entries are streamed out
+    of the archive. Returns the staged paths, in order.
+    """
+    stage_dir.mkdir(parents=True, exist_ok=True)
+    staged = []
+    zips = {}
+    try:
+        for i, page in enumerate(images, start=1):
+            out = stage_dir / f"{STAGE_NAME % i}{ext}"
+            staged.append(out)
+            if isinstance(page, tuple):
+                cbz_path, name = page
+                if cbz_path not in zips:
+                    zips[cbz_path] = zipfile.ZipFile(cbz_path, "r")
+                with zips[cbz_path].open(name) as src, open(out, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+            else:
+                os.symlink(page, out)
+    finally:
+        for z in zips.values():
+            z.close()
+    return staged
+
+
+@functools.lru_cache(maxsize=None)
+def _zipfile(cbz_path: Path) -> zipfile.ZipFile:
+    # Kept open per worker process so the central directory is parsed once, not per page
+    return zipfile.ZipFile(cbz_path, "r")
+
+
+def _page_bytes(page: Page) -> bytes:
+    """The encoded page: the file's contents, or the zip entry's."""
+    if isinstance(page, tuple):
+        cbz_path, name = page
+        return _zipfile(cbz_path).read(name)
+    return page.read_bytes()
+
+
+def _load_rgb(src: bytes, target_w: int, target_h: int) -> Image.Image:
+    """Decode an encoded page as RGB, letting libjpeg shrink big JPEGs while decoding."""
+    with Image.open(io.BytesIO(src)) as im:
+        if im.format == "JPEG":
+            # DCT-domain 1/2, 1/4 or 1/8 scaling, never below 2x the target on either axis
+            im.draft("RGB", (target_w * 2, target_h * 2))
+        if im.mode in ("RGBA", "LA", "PA") or "transparency" in im.info:
+            # Flatten onto black like the letterbox (and the vips backend) instead of
+            # exposing whatever colour sits under transparent pixels
+            black = Image.new("RGBA", im.size, (0, 0, 0, 255))
+            return Image.alpha_composite(black, im.convert("RGBA")).convert("RGB")
+        return im.convert("RGB")
+
+
+@functools.lru_cache(maxsize=1)
+def _canvas(target_w: int, target_h: int) -> Image.Image:
+    # One canvas per worker process, reused across pages to avoid a full-frame allocation per image
+    return Image.new("RGB", (target_w, target_h), 0)
+
+
+def _render_frame_vips(src: bytes, target_w: int, target_h: int, fit: str) -> bytes:
+    # thumbnail() shrinks on load and uses libvips' vectorized separable resampler
+    # no_rotate: ignore EXIF orientation like the Pillow-based backends do
+    opts = {"height": target_h, "size": "both", "no_rotate": True}
+    if fit == "cover":
+        opts["crop"] = "centre"
+    im = pyvips.Image.thumbnail_buffer(src, target_w, **opts)
+    if im.hasalpha():
+        im = im.flatten(background=[0, 0, 0])
+    im = im.colourspace("srgb").cast("uchar")
+    # letterbox (no-op for cover, which is already cropped to size)
+    left = (target_w - im.width) // 2
+    top = (target_h - im.height) // 2
+    im = im.embed(left, top, target_w, target_h, extend="black")
+    return bytes(im.write_to_memory())
+
+
+@functools.lru_cache(maxsize=32)
+def _lanczos_matrix(src: int, dst: int):
+    """
+    (dst x src) sparse matrix of Lanczos-3 taps resampling one axis, with the kernel
+    widened when downscaling (antialiasing, as PIL does). Cached per worker, so pages
+    scanned at the same size evaluate the kernel once.
+    """
+    scale = src / dst
+    fscale = max(scale, 1.0)
+    support = 3.0 * fscale
+    centers = (np.arange(dst) + 0.5) * scale
+    cols = np.floor(centers - support + 0.5).astype(np.int64)[:, None] + np.arange(int(np.ceil(support)) * 2 + 1)
+    x = (cols + 0.5 - centers[:, None]) / fscale
+    w = np.sinc(x) * np.sinc(x / 3)
+    w[(np.abs(x) >= 3) | (cols < 0) | (cols >= src)] = 0
+    w /= w.sum(axis=1, keepdims=True)
+    rows = np.broadcast_to(np.arange(dst)[:, None], cols.shape)
+    return scipy.sparse.csr_matrix(
+        (w.astype(np.float32).ravel(), (rows.ravel(), np.clip(cols, 0, src - 1).ravel())),
+        shape=(dst, src),
+    )
+
+
+def _render_frame_sparse(src: bytes, target_w: int, target_h: int, fit: str) -> bytes:
+    arr = np.asarray(_load_rgb(src, target_w, target_h), dtype=np.float32)
+    h, w = arr.shape[:2]
+
+    scale = max(target_w / w, target_h / h) if fit == "cover" else min(target_w / w, target_h / h)
+    sw, sh = int(w * scale), int(h * scale)
+    if fit == "cover":
+        sw, sh = max(sw, target_w), max(sh, target_h)  # int() can land 1px short
+    mv = _lanczos_matrix(h, sh)
+    mh = _lanczos_matrix(w, sw)
+    if fit == "cover":
+        # only compute the rows/columns that survive the crop
+        left = (sw - target_w) // 2
+        top = (sh - target_h) // 2
+        mv = mv[top:top + target_h]
+        mh = mh[left:left + target_w]
+        sw, sh, left, top = target_w, target_h, 0, 0
+    else:
+        left = (target_w - sw) // 2
+        top = (target_h - sh) // 2
+
+    # Vertical then horizontal pass, all three channels per matmul
+    out = mv @ arr.reshape(h, w * 3)
+    out = mh @ out.reshape(sh, w, 3).transpose(1, 0, 2).reshape(w, sh * 3)
+    out = out.reshape(sw, sh, 3).transpose(1, 0, 2)
+
+    frame = np.zeros((target_h, target_w, 3), dtype=np.uint8)
+    frame[top:top + sh, left:left + sw] = np.clip(np.rint(out), 0, 255)
+    return frame.tobytes()
+
+
+def _render_frame_numba(src: bytes, target_w: int, target_h: int, fit: str) -> bytes:
+    import numba
+    import _resize_lanczos
+
+    # The process pool already occupies every core
+    numba.set_num_threads(1)
+    arr = np.asarray(_load_rgb(src, target_w, target_h))
+    h, w = arr.shape[:2]
+
+    if fit == "cover":
+        scale = max(target_w / w, target_h / h)
+        sw, sh = max(int(w * scale), target_w), max(int(h * scale), target_h)
+        left = (sw - target_w) // 2
+        top = (sh - target_h) // 2
+        return _resize_lanczos.resize(arr, (sw, sh), box=(left, top, left + target_w, top + target_h)).tobytes()
+
+    scale = min(target_w / w, target_h / h)
+    sw, sh = int(w * scale), int(h * scale)
+    left = (target_w - sw) // 2
+    top = (target_h - sh) // 2
+    frame = np.zeros((target_h, target_w, 3), dtype=np.uint8)
+    frame[top:top + sh, left:left + sw] = _resize_lanczos.resize(arr, (sw, sh))
+    return frame.tobytes()
+
+
+def rgb24_to_yuv420p(rgb: bytes, width: int, height: int) -> bytes:
+    """Packed RGB24 -> planar BT.709 limited-range yuv420p (Y, then 2x2-averaged U and V)."""
+    arr = np.frombuffer(rgb, dtype=np.uint8).reshape(height, width, 3).astype(np.float32)
+    m = np.asarray(BT709, dtype=np.float32)
+    y = np.einsum("hwc,c->hw", arr, m[0]) + 16
+    # chroma is linear in RGB, so average the 2x2 block before converting
+    sub = arr.reshape(height // 2, 2, width // 2, 2, 3).mean(axis=(1, 3))
+    uv = np.einsum("hwc,kc->khw", sub, m[1:]) + 128
+    planes = [np.clip(np.rint(p), 0, 255).astype(np.uint8) for p in (y, uv[0], uv[1])]
+    return b"".join(p.tobytes() for p in planes)
+
+
+def _render_frame(args: Tuple[Page, int, int, str, str, str]) -> bytes:
+    """Render one page to a raw FRAME_PIX_FMT buffer. Top-level so it pickles for the process pool."""
+    page, target_w, target_h, fit, backend, resample = args
+    # Cached on disk by source content and render settings, so re-runs with another
+    # script, voice, zoom or pan skip decoding and resizing entirely. The page is read
+    # once: hashed here and, on a miss, decoded from the same buffer.
+    src = _page_bytes(page)
+    digest = hashlib.blake2b(src, digest_size=16).hexdigest()
+    key = f"{digest}_{target_w}x{target_h}_{fit}_{backend}_{resample}"
+    try:
+        out = cache_dir("frames") / f"{key}.{FRAME_PIX_FMT}"
+    except OSError:
+        out = None  # no usable cache: just render
+    if out is not None:
+        try:
+            data = out.read_bytes()
+            os.utime(out)  # mark as recently used
+            return data
+        except OSError:
+            pass
+
+    try:
+        rgb = _render_rgb(src, target_w, target_h, fit, backend, resample)
+    except Exception as e:
+        # Decoders only see a buffer, so name the page here
+        where = f"{page[0]} ({_page_name(page)})" if isinstance(page, tuple) else str(page)
+        # Pillow's message would only name the in-memory buffer
+        reason = "not a recognised image" if isinstance(e, PIL.UnidentifiedImageError) else e
+        raise RuntimeError(f"Cannot render page {where}: {reason}") from e
+    data = rgb24_to_yuv420p(rgb, target_w, target_h) if FRAME_PIX_FMT == "yuv420p" else rgb
+    if out is not None:
+        tmp = out.with_name(f"{key}.{os.getpid()}.part")
+        try:
+            tmp.write_bytes(data)
+            os.replace(tmp, out)
+        except OSError:
+            pass
+        finally:
+            tmp.unlink(missing_ok=True)
+    return data
+
+
+def pillow_filter(resample: str, scale: float) -> Image.Resampling:
+    """
+    Map a --filter choice to a Pillow filter. auto keeps Lanczos for real downscales
+    only: near 1x and when upscaling, bicubic is visually the same and several times
+    cheaper.
+    """
+    if resample == "auto":
+        resample = "lanczos" if scale < 0.85 else "bicubic"
+    return {
+        "lanczos": Image.Resampling.LANCZOS,
+        "bicubic": Image.Resampling.BICUBIC,
+        "bilinear": Image.Resampling.BILINEAR,
+    }[resample]
+
+
+def _render_rgb(src: bytes, target_w: int, target_h: int, fit: str, backend: str, resample: str) -> bytes:
+    """Decode and fit an encoded page to a raw RGB24 target_w x target_h buffer."""
+    if backend == "vips":
+        return _render_frame_vips(src, target_w, target_h, fit)
+    if backend == "sparse":
+        return _render_frame_sparse(src, target_w, target_h, fit)
+    if backend == "numba":
+        return _render_frame_numba(src, target_w, target_h, fit)
+
+    # pillow and pillow-simd share this path; pillow-simd is a drop-in build of PIL
+    canvas = _canvas(target_w, target_h)
+    im = _load_rgb(src, target_w, target_h)
+    w, h = im.size
+
+    if fit == "cover":
+        # scale then crop to fill
+        scale = max(target_w / w, target_h / h)
+        sw, sh = int(w * scale), int(h * scale)
+        im = im.resize((sw, sh), pillow_filter(resample, scale))
+        left = (sw - target_w) // 2
+        top = (sh - target_h) // 2
+        im = im.crop((left, top, left + target_w, top + target_h))
+        canvas.paste(im, (0, 0))
+    else:
+        # contain: scale then paste on black canvas
+        scale = min(target_w / w, target_h / h)
+        sw, sh = int(w * scale), int(h * scale)
+        im_resized = im.resize((sw, sh), pillow_filter(resample, scale))
+        left = (target_w - sw) // 2
+        top = (target_h - sh) // 2
+        canvas.paste(0, (0, 0, target_w, target_h))
+        canvas.paste(im_resized, (left, top))
 
+    return canvas.tobytes()
 
-def ensure_even_dimensions(img_path: Path) -> None:
-    # Some encoders dislike odd dimensions; ensure width/height are even
-    with Image.open(img_path) as im:
-        w, h = im.size
-        nw, nh = (w // 2) * 2, (h // 2) * 2
-        if (nw, nh) != (w, h):
-            im = im.crop((0, 0, nw, nh))
-            im.save(img_path)
+
+def _ordered_map(pool: Executor, fn: Callable, tasks: Iterable, window: int) -> Iterator:
+    """
+    Like pool.map, but keeps at most `window` tasks in flight. Executor.map submits
+    everything up front, which would buffer every rendered frame in memory whenever
+    the encoder is slower than the workers.
+    """
+    pending: Deque[Future] = deque()
+    for task in tasks:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(pool.submit(fn, task))
+    while pending:
+        yield pending.popleft().result()
 
 
 def make_frames(
-    images: List[Path],
-    frames_dir: Path,
+    images: List[Page],
     target_w: int,
     target_h: int,
     fit: str = "contain",
-) -> None:
+    backend: str = "pillow",
+    resample: str = "auto",
+) -> Iterator[bytes]:
     """
-    Convert images to uniform PNG frames at target resolution.
+    Yield uniform raw frames (FRAME_PIX_FMT at target_w x target_h), in order.
+    Pages are resized in parallel across CPU cores.
     fit:
       - contain: letterbox (no crop)
       - cover: crop to fill
+    backend: resize implementation, one of BACKENDS
+    resample: resize filter for the Pillow backends, one of FILTERS
     """
-    frames_dir.mkdir(parents=True, exist_ok=True)
-
-    for i, img in enumerate(images, start=1):
-        out = frames_dir / f"frame_{i:05d}.png"
-        with Image.open(img) as im:
-            im = im.convert("RGB")
-            w, h = im.size
-
-            if fit == "cover":
-                # scale then crop to fill
-                scale = max(target_w / w, target_h / h)
-                sw, sh = int(w * scale), int(h * scale)
-                im = im.resize((sw, sh), Image.LANCZOS)
-                left = (sw - target_w) // 2
-                top = (sh - target_h) // 2
-                im = im.crop((left, top, left + target_w, top + target_h))
-            else:
-                # contain: scale then paste on black canvas
-                scale = min(target_w / w, target_h / h)
-                sw, sh = int(w * scale), int(h * scale)
-                im_resized = im.resize((sw, sh), Image.LANCZOS)
-                canvas = Image.new("RGB", (target_w, target_h), (0, 0, 0))
-                left = (target_w - sw) // 2
-                top = (target_h - sh) // 2
-                canvas.paste(im_resized, (left, top))
-                im = canvas
-
-            # ensure even dims
-            if (target_w % 2) or (target_h % 2):
-                die("Target width/height must be even numbers.")
-            im.save(out, "PNG")
-
-        ensure_even_dimensions(out)
-
-    print(f"[OK] Frames created: {len(images)} → {frames_dir}")
+    workers = os.cpu_count() or 1
+    if backend not in ("pillow", "pillow-simd"):
+        # vips/sparse/numba always use their own Lanczos; don't let --filter split the frame cache
+        resample = "lanczos"
+    tasks = [(img, target_w, target_h, fit, backend, resample) for img in images]
+    # The pool is started from an executor thread while the main thread runs TTS and
+    # ffmpeg; forking then could leak their pipe fds into workers (hanging subprocess),
+    # so workers are spawned fresh instead.
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            yield from _ordered_map(pool, _render_frame, tasks, window=workers * 2)
+    finally:
+        # Also when ffmpeg stops reading early or a worker fails: the cap holds either way
+        try:
+            prune_cache(cache_dir("frames"), FRAME_CACHE_MAX_BYTES)
+        except OSError:
+            pass
+
+    print(f"[OK] Frames rendered: {len(images)}")
+
+
+def split_script(text: str, max_chars: int = TTS_CHUNK_CHARS) -> List[str]:
+    """Split narration on sentence boundaries into chunks of up to ~max_chars."""
+    chunks: List[str] = []
+    for sentence in re.split(r"(?<=[.!?])\s+", text):
+        if chunks and len(chunks[-1]) + 1 + len(sentence) <= max_chars:
+            chunks[-1] += " " + sentence
+        else:
+            chunks.append(sentence)
+    return chunks
+
+
+async def _synth_chunk(text: str, voice: str, rate: str, sem: asyncio.Semaphore, folder: Path) -> Path:
+    # Cached on disk by (text, voice, rate) so repeated lines and re-runs skip the network
+    key = hashlib.sha256(f"{voice}\0{rate}\0{text}".encode("utf-8")).hexdigest()
+    out = folder / f"{key}.mp3"
+    if out.exists():
+        os.utime(out)  # mark as recently used
+        return out
+    tmp = out.with_name(f"{key}.{os.getpid()}.part.mp3")
+    try:
+        async with sem:
+            await edge_tts.Communicate(text=text, voice=voice, rate=rate).save(str(tmp))
+        os.replace(tmp, out)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return out
 
 
 async def synth_tts_edge(text: str, out_mp3: Path, voice: str, rate: str = "+0%") -> None:
-    if edge_tts is None:
-        die("edge-tts is not installed. Run: pip install edge-tts")
-    communicate = edge_tts.Communicate(text=text, voice=voice, rate=rate)
-    await communicate.save(str(out_mp3))
+    """
+    Synthesize narration in sentence-aligned chunks, TTS_CONCURRENCY requests at a
+    time, then join them losslessly with ffmpeg's concat demuxer.
+    """
+    chunks = split_script(text)
+    unique = list(dict.fromkeys(chunks))
+    try:
+        folder = cache_dir("tts")
+    except OSError as e:
+        print(f"[INFO] TTS cache unavailable ({e}); keeping chunks in the work folder")
+        folder = None
+    sem = asyncio.Semaphore(TTS_CONCURRENCY)
+    paths = await asyncio.gather(*(_synth_chunk(c, voice, rate, sem, folder or out_mp3.parent) for c in unique))
+    by_text = dict(zip(unique, paths))
+    parts = [by_text[c] for c in chunks]
+
+    if len(parts) == 1:
+        shutil.copyfile(parts[0], out_mp3)
+    else:
+        list_txt = out_mp3.with_suffix(".concat.txt")
+        list_txt.write_text("".join(f"file {concat_quote(p)}\n" for p in parts), encoding="utf-8")
+        run([
+            "ffmpeg", "-y",
+            "-f", "concat", "-safe", "0",
+            "-i", str(list_txt),
+            "-c", "copy",
+            str(out_mp3),
+        ])
+    if folder is not None:
+        prune_cache(folder, TTS_CACHE_MAX_BYTES)
 
 
 def read_script(script_path: Optional[Path], default_text: str) -> str:
@@ -169,7 +675,9 @@ def get_audio_duration_sec(audio_path: Path) -> float:
 
 
 def build_video_with_kenburns(
-    frames_dir: Path,
+    source: Union[List[Path], Iterable[bytes]],
+    width: int,
+    height: int,
     audio_mp3: Path,
     out_mp4: Path,
     fps: int,
@@ -177,69 +685,128 @@ def build_video_with_kenburns(
     zoom: float,
     pan: str,
     crf: int,
+    fit: str = "contain",
+    encoder: str = "x264",
+    resample: str = "auto",
 ) -> None:
     """
-    Uses ffmpeg zoompan to animate each image, concatenated from frames.
-    We first generate a video from frames with zoompan, then mux audio.
+    Uses ffmpeg zoompan to animate each image and muxes the audio in the same encode.
+    source is either the list of staged pages (see stage_pages), which ffmpeg
+    scales/letterboxes itself in the same filter graph, or an iterable of raw
+    FRAME_PIX_FMT frames already at width x height, fed over stdin.
     """
-    temp_video = out_mp4.with_suffix(".silent.mp4")
-
     # zoompan basics:
     # - Each input frame is 1 image; we use -framerate 1/seconds_per_image by repeating frames.
     # Alternative: treat frames as an image sequence at fps and use zoompan with d=... (frames per image).
     d = max(1, int(round(seconds_per_image * fps)))
-
-    # Pan direction presets
-    # x/y expressions reference "iw/ih" and "zoom"
+    # No motion: skip zoompan and just hold each page (see below)
+    static = pan == "center" and abs(zoom - 1.0) < 1e-3
+
+    # Expressions are specialised in Python so ffmpeg's per-frame evaluator gets no
+    # branches or divisions by d. zoompan's `on`/`in` count across the whole output,
+    # so k = on - d*in is the frame index within the current image; iw/ih are always
+    # width/height here (frames are already fitted) and are folded into constants.
+    k = f"(on-{d}*in)"
+    # Zoom: ramp from 1 to the target zoom over each image
+    z_expr = f"1+{(zoom - 1) / d:.8g}*{k}"
+
+    # Pan direction presets: the crop window drifts by 10% of its size over each image
+    cx, cy = width / 2, height / 2
+    x_expr = f"{cx:g}-{cx:g}/zoom"
+    y_expr = f"{cy:g}-{cy:g}/zoom"
     if pan == "left":
-        x_expr = "iw/2-(iw/zoom)/2 - (iw/zoom)*0.10*(on/d)"
-        y_expr = "ih/2-(ih/zoom)/2"
+        x_expr = f"{cx:g}-({cx:g}+{width * 0.10 / d:.8g}*{k})/zoom"
     elif pan == "right":
-        x_expr = "iw/2-(iw/zoom)/2 + (iw/zoom)*0.10*(on/d)"
-        y_expr = "ih/2-(ih/zoom)/2"
+        x_expr = f"{cx:g}-({cx:g}-{width * 0.10 / d:.8g}*{k})/zoom"
     elif pan == "up":
-        x_expr = "iw/2-(iw/zoom)/2"
-        y_expr = "ih/2-(ih/zoom)/2 - (ih/zoom)*0.10*(on/d)"
+        y_expr = f"{cy:g}-({cy:g}+{height * 0.10 / d:.8g}*{k})/zoom"
     elif pan == "down":
-        x_expr = "iw/2-(iw/zoom)/2"
-        y_expr = "ih/2-(ih/zoom)/2 + (ih/zoom)*0.10*(on/d)"
-    else:
-        x_expr = "iw/2-(iw/zoom)/2"
-        y_expr = "ih/2-(ih/zoom)/2"
-
-    # Zoom expression: gently increase until target zoom, then hold
-    # on is the output frame number for the current input image inside zoompan
-    z_expr = f"if(lte(on, {d}), 1+({zoom}-1)*on/{d}, {zoom})"
+        y_expr = f"{cy:g}-({cy:g}-{height * 0.10 / d:.8g}*{k})/zoom"
 
-    vf = (
-        f"zoompan=z='{z_expr}':x='{x_expr}':y='{y_expr}':d={d}:fps={fps},"
-        f"format=yuv420p"
-    )
+    filters = [] if static else [f"zoompan=z='{z_expr}':x='{x_expr}':y='{y_expr}':d={d}:s={width}x{height}:fps={fps}"]
+    # zoompan keeps yuv420p input as is; only convert when the encoder wants something else
+    if isinstance(source, list) or ENCODERS[encoder][1] != FRAME_PIX_FMT:
+        filters.append(f"format={ENCODERS[encoder][1]}")
+    vf = ",".join(filters) or "null"
 
-    run([
-        "ffmpeg", "-y",
-        "-framerate", str(fps),
-        "-i", str(frames_dir / "frame_%05d.png"),
-        "-vf", vf,
-        "-c:v", "libx264",
-        "-crf", str(crf),
-        "-preset", "medium",
-        str(temp_video),
-    ])
-
-    # Mux audio (shortest to end with audio)
-    run([
-        "ffmpeg", "-y",
-        "-i", str(temp_video),
+    # Audio is muxed in the same pass (shortest to end with audio)
+    encode = [
         "-i", str(audio_mp3),
-        "-c:v", "copy",
+        "-map", "0:v", "-map", "1:a",
+        "-vf", vf,
+    ] + encoder_args(encoder, crf) + [
         "-c:a", "aac",
         "-b:a", "192k",
         "-shortest",
+        "-movflags", "+faststart",
         str(out_mp4),
-    ])
+    ]
+    if static:
+        # Each page is held by repeating it at the output rate: plain frame copies that
+        # x264 encodes as skip frames, instead of d zoompan resamples per page
+        encode[-1:-1] = ["-fps_mode", "cfr", "-r", str(fps)]
+    if isinstance(source, list):
+        # Fuse scale + letterbox/crop into the same graph as zoompan. One graph serves
+        # every page, so auto can't pick per page ratio and stays on Lanczos.
+        flags = "lanczos" if resample == "auto" else resample
+        if fit == "cover":
+            fit_vf = (
+                f"scale=w={width}:h={height}:force_original_aspect_ratio=increase:flags={flags},"
+                f"crop={width}:{height}"
+            )
+        else:
+            fit_vf = (
+                f"scale=w={width}:h={height}:force_original_aspect_ratio=decrease:flags={flags},"
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color=black"
+            )
+        ext = source[0].suffix
+        if ext in (".png", ".webp"):
+            # Premultiplying flattens transparency onto black once alpha is dropped,
+            # matching the Python backends
+            fit_vf = f"format=rgba,premultiply=inplace=1,{fit_vf}"
+        if static:
+            # Decode each page once, with its duration taken from the concat list
+            concat_txt = source[0].parent / "concat.txt"
+            concat_txt.write_text(
+                # pattern_type none: a % in the path (e.g. TMPDIR) is not an image2 sequence
+                "".join(
+                    f"file {concat_quote(p)}\noption pattern_type none\nduration {seconds_per_image}\n"
+                    for p in source
+                ),
+                encoding="utf-8",
+            )
+            video_in = ["-f", "concat", "-safe", "0", "-i", str(concat_txt)]
+        else:
+            # Only STAGE_NAME is a sequence pattern; any % in the folder is escaped
+            pattern = str(source[0].parent).replace("%", "%%") + os.sep + STAGE_NAME + ext
+            video_in = ["-framerate", str(fps), "-i", pattern]
+        encode[encode.index("-vf") + 1] = f"{fit_vf},setsar=1,{vf}"
+        run([
+            "ffmpeg", "-y",
+            # Pages differ in size; rebuilding the graph per page would restart zoompan's
+            # frame counter (colliding timestamps get dropped). scale adapts on the fly.
+            "-reinit_filter", "0",
+        ] + video_in + encode)
+    else:
+        colour = []
+        if FRAME_PIX_FMT == "yuv420p":
+            colour = ["-color_range", "tv", "-colorspace", "bt709", "-color_primaries", "bt709", "-color_trc", "bt709"]
+        try:
+            run_piped([
+                "ffmpeg", "-y",
+                "-f", "rawvideo",
+                "-pix_fmt", FRAME_PIX_FMT,
+                "-s", f"{width}x{height}",
+            ] + colour + [
+                # Static: one frame per page, duplicated up to fps by the output -r
+                "-framerate", f"1/{seconds_per_image:g}" if static else str(fps),
+                "-i", "pipe:0",
+            ] + encode, source)
+        except BaseException:
+            # A page failed mid-encode: don't leave a shorter video at --out
+            out_mp4.unlink(missing_ok=True)
+            raise
 
-    temp_video.unlink(missing_ok=True)
     print(f"[OK] Video created: {out_mp4}")
 
 
@@ -255,15 +822,27 @@ def main():
     parser.add_argument("--rate", type=str, default="+0%", help="TTS rate, e.g. -10%, +10%")
     parser.add_argument("--fps", type=int, default=30, help="Video FPS")
     parser.add_argument("--seconds-per-image", type=float, default=3.0, help="Seconds each page stays on screen")
-    parser.add_argument("--w", type=int, default=1080, help="Target width (even number recommended)")
-    parser.add_argument("--h", type=int, default=1920, help="Target height (even number recommended)")
+    parser.add_argument("--w", type=int, default=1080, help="Target width (must be even)")
+    parser.add_argument("--h", type=int, default=1920, help="Target height (must be even)")
     parser.add_argument("--fit", choices=["contain", "cover"], default="contain", help="Resize behavior: contain(letterbox) or cover(crop)")
+    parser.add_argument("--backend", choices=BACKENDS, default="ffmpeg", help="Image resize backend: ffmpeg (scale inside the encode graph), pillow, pillow-simd (AVX2 build of Pillow), vips (libvips via pyvips), sparse (Lanczos as cached numpy/scipy sparse matrices) or numba (cache-blocked fixed-point Lanczos)")
+    parser.add_argument("--filter", choices=FILTERS, default="auto", help="Resize filter for the ffmpeg and pillow backends; auto uses Lanczos only when shrinking below 0.85x and bicubic otherwise")
     parser.add_argument("--zoom", type=float, default=1.12, help="Target zoom factor per image (e.g. 1.08 to 1.20)")
     parser.add_argument("--pan", choices=["center", "left", "right", "up", "down"], default="center", help="Pan direction")
-    parser.add_argument("--crf", type=int, default=20, help="x264 quality (lower=better, typical 18-23)")
+    parser.add_argument("--crf", type=int, default=20, help="x264 quality (lower=better, typical 18-23); mapped onto the hardware encoders' quality setting")
+    parser.add_argument("--encoder", choices=list(ENCODERS), default="x264", help="Video encoder: x264 (CPU) or a hardware encoder (nvenc, hevc_nvenc, videotoolbox, qsv); falls back to x264 if unavailable")
     args = parser.parse_args()
 
+    # 4:2:0 video needs even dimensions. Checked once here: every canvas, letterbox
+    # and crop is sized from these, so frames never need trimming afterwards.
+    if (args.w % 2) or (args.h % 2):
+        die("Target width/height must be even numbers.")
+
     check_ffmpeg()
+    check_backend(args.backend)
+    if edge_tts is None:
+        die("edge-tts is not installed. Run: pip install edge-tts")
+    encoder = resolve_encoder(args.encoder)
 
     out_mp4 = Path(args.out).resolve()
     out_mp4.parent.mkdir(parents=True, exist_ok=True)
@@ -274,6 +853,12 @@ def main():
     )
     text = read_script(Path(args.script) if args.script else None, default_narration)
 
+    asyncio.run(amain(args, text, out_mp4, encoder))
+
+
+async def amain(args: argparse.Namespace, text: str, out_mp4: Path, encoder: str) -> None:
+    loop = asyncio.get_running_loop()
+
     with tempfile.TemporaryDirectory() as tmp:
         tmp_dir = Path(tmp)
         work_dir = tmp_dir / "work"
@@ -281,24 +866,43 @@ def main():
 
         # Load images
         if args.cbz:
-            imgs = extract_cbz(Path(args.cbz).resolve(), work_dir / "cbz_extract")
+            imgs = list_cbz_pages(Path(args.cbz).resolve())
         else:
             imgs = collect_images_from_dir(Path(args.images).resolve())
 
-        frames_dir = work_dir / "frames"
-        make_frames(imgs, frames_dir, args.w, args.h, fit=args.fit)
+        # Frame source: let ffmpeg scale the original pages, or pre-render them in Python
+        backend = args.backend
+        ext = common_page_ext(imgs) if backend == "ffmpeg" else None
+        if backend == "ffmpeg" and ext is None:
+            print("[INFO] Pages mix image formats; falling back to --backend pillow")
+            backend = "pillow"
+
+        # Page prep runs while TTS is in flight; only the encode needs both.
+        # For the Python backends that means starting the render pool, which works
+        # ahead of the encoder, and waiting for the first frame.
+        if backend == "ffmpeg":
+            prep = loop.run_in_executor(None, stage_pages, imgs, work_dir / "pages", ext)
+        else:
+            frames = make_frames(imgs, args.w, args.h, fit=args.fit, backend=backend, resample=args.filter)
+            prep = loop.run_in_executor(None, next, frames)
 
         # TTS
         audio_mp3 = work_dir / "narration.mp3"
         print(f"[INFO] Generating TTS with voice={args.voice} rate={args.rate} ...")
-        asyncio.run(synth_tts_edge(text=text, out_mp3=audio_mp3, voice=args.voice, rate=args.rate))
+        # Awaited directly rather than gathered as a task, so a die() in it (e.g. the
+        # concat step) exits with its one-line [ERROR] instead of an asyncio traceback
+        await synth_tts_edge(text=text, out_mp3=audio_mp3, voice=args.voice, rate=args.rate)
         print(f"[OK] Audio created: {audio_mp3}")
+        prepared = await prep
+        source = prepared if backend == "ffmpeg" else itertools.chain([prepared], frames)
 
         # Optional: adapt seconds_per_image based on audio length if user wants auto pacing
         # Here we keep it simple: use provided seconds-per-image.
 
         build_video_with_kenburns(
-            frames_dir=frames_dir,
+            source=source,
+            width=args.w,
+            height=args.h,
             audio_mp3=audio_mp3,
             out_mp4=out_mp4,
             fps=args.fps,
@@ -306,6 +910,9 @@ def main():
             zoom=args.zoom,
             pan=args.pan,
             crf=args.crf,
+            fit=args.fit,
+            encoder=encoder,
+            resample=args.filter,
         )
 
 